@@ -9,11 +9,16 @@
 #==============================================================================
 
 import os
+import io
+import errno
+import array
+import mmap
 import struct
 import argparse
 import time
 import sys
-import concurrent.futures
+import itertools
+import threading
 from concurrent.futures import ThreadPoolExecutor
 
 #==============================================================================
@@ -23,40 +28,146 @@ from concurrent.futures import ThreadPoolExecutor
 CDFS_MAGIC = 0x43444653 #SFDC
 CDFS_VERSION = 1
 
+CDFS_HEADER = struct.Struct('<IIIIIIIIII')
+CDFS_FILE_ENTRY = struct.Struct('<IIII')
+
+UNPACK_MAX_WORKERS = 8
+PACK_BUFFER_SIZE = 1024 * 1024
+SMALL_FILE_SIZE = 64 * 1024
+COALESCE_BUFFER_SIZE = 16 * 1024 * 1024
+MAP_WINDOW_SIZE = 64 * 1024 * 1024
+
 #==============================================================================
 
 def unpack_string_from_table(string_table, offset):
-    end = offset
-    while end < len(string_table) and string_table[end] != 0:
-        end += 1
+    end = string_table.find(b'\0', offset)
+    if end < 0:
+        end = len(string_table)
     return string_table[offset:end].decode('utf-8')
 
 #==============================================================================
 
-def unpack_file_task(input_file, entry, file_path, file_offset, file_length):
-    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+def unpack_string_table(string_table):
+    strings = {}
+    offset = 0
+    for string_data in string_table.split(b'\0'):
+        try:
+            strings[offset] = string_data.decode('utf-8')
+        except UnicodeDecodeError:
+            pass
+        offset += len(string_data) + 1
+    return strings
+
+#==============================================================================
+
+def get_string(strings, string_table, offset):
+    string_value = strings.get(offset)
+    if string_value is None:
+        # Offset points into the middle of a string or at undecodable data
+        string_value = unpack_string_from_table(string_table, offset)
+    return string_value
+
+#==============================================================================
+
+def unpack_file_table(file_table_data):
+    file_table = array.array('I', file_table_data)
+    if sys.byteorder == 'big':
+        file_table.byteswap()
     
-    with open(input_file, 'rb') as f:
-        with open(file_path, 'wb') as out_file:
-            f.seek(file_offset)
-            remaining = file_length
-            buffer_size = 16 * 1024 * 1024
+    # Columns: file name offsets, dir name offsets, start sectors, lengths
+    return file_table[0::4], file_table[1::4], file_table[2::4], file_table[3::4]
+
+#==============================================================================
+
+def pack_file_table(file_name_offsets, dir_name_offsets, start_sectors, lengths):
+    file_table = array.array('I', [0]) * (len(lengths) * 4)
+    file_table[0::4] = file_name_offsets
+    file_table[1::4] = dir_name_offsets
+    file_table[2::4] = start_sectors
+    file_table[3::4] = lengths
+    
+    if sys.byteorder == 'big':
+        file_table.byteswap()
+    return file_table.tobytes()
+
+#==============================================================================
+
+_archive_local = threading.local()
+_write_lock = threading.Lock()
+
+def get_archive_fd(input_file):
+    archives = getattr(_archive_local, 'archives', None)
+    if archives is None:
+        archives = _archive_local.archives = {}
+    
+    # Kept as a file object so the handle is closed when the worker thread exits
+    archive = archives.get(input_file)
+    if archive is None:
+        archive = archives[input_file] = open(input_file, 'rb', buffering=0)
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(archive.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+    return archive.fileno()
+
+#==============================================================================
+
+def copy_archive_range(input_file, dst_fd, offset, length):
+    src_fd = get_archive_fd(input_file)
+    remaining = length
+    
+    if hasattr(os, 'copy_file_range'):
+        try:
             while remaining > 0:
-                chunk_size = min(remaining, buffer_size)
-                chunk = f.read(chunk_size)
-                out_file.write(chunk)
-                remaining -= chunk_size
+                copied = os.copy_file_range(src_fd, dst_fd, remaining, offset_src=offset)
+                if copied == 0:
+                    break
+                offset += copied
+                remaining -= copied
+        except OSError:
+            pass
     
-    return file_path
+    if remaining > 0 and hasattr(os, 'sendfile'):
+        try:
+            while remaining > 0:
+                copied = os.sendfile(dst_fd, src_fd, offset, remaining)
+                if copied == 0:
+                    break
+                offset += copied
+                remaining -= copied
+        except OSError:
+            pass
+    
+    if remaining > 0:
+        # Write straight out of bounded windows of the archive, no intermediate bytes copy.
+        # Views are released before each map closes, so a failed write cannot pin the map.
+        end = min(offset + remaining, os.fstat(src_fd).st_size)
+        while offset < end:
+            map_offset = offset - offset % mmap.ALLOCATIONGRANULARITY
+            map_length = min(end - map_offset, MAP_WINDOW_SIZE)
+            with mmap.mmap(src_fd, map_length, offset=map_offset, access=mmap.ACCESS_READ) as archive_map:
+                with memoryview(archive_map) as view:
+                    while offset < map_offset + map_length:
+                        with view[offset - map_offset:] as chunk:
+                            offset += os.write(dst_fd, chunk)
+
+#==============================================================================
+
+def unpack_file_task(input_file, file_path, file_offset, file_length):
+    try:
+        with open(file_path, 'wb') as out_file:
+            copy_archive_range(input_file, out_file.fileno(), file_offset, file_length)
+        
+        return None
+    except Exception as e:
+        return e
 
 #==============================================================================
 
 def unpack_cdfs(input_file, output_dir, max_workers=None, debug_mode=False):        
     with open(input_file, 'rb') as f:
-        header_data = f.read(40)
+        header_data = f.read(CDFS_HEADER.size)
         magic, version, sector_size, recommended_cache_size, first_sector_offset, \
         total_sectors, file_table_length, file_table_entries, string_table_length, \
-        string_table_entries = struct.unpack('<IIIIIIIIII', header_data)
+        string_table_entries = CDFS_HEADER.unpack(header_data)
         
         magic_text = struct.pack('>I', magic).decode('ascii')
         
@@ -73,61 +184,62 @@ def unpack_cdfs(input_file, output_dir, max_workers=None, debug_mode=False):
             print(f"Total Sectors: {total_sectors}")
             print(f"File Table Entries: {file_table_entries}")
         
-        file_table = []
-        for _ in range(file_table_entries):
-            entry_data = f.read(16)
-            file_name_offset, dir_name_offset, start_sector, length = struct.unpack('<IIII', entry_data)
-            file_table.append({
-                'file_name_offset': file_name_offset,
-                'dir_name_offset': dir_name_offset,
-                'start_sector': start_sector,
-                'length': length
-            })
+        file_table_data = f.read(file_table_entries * CDFS_FILE_ENTRY.size)
+        if len(file_table_data) < file_table_entries * CDFS_FILE_ENTRY.size:
+            print(f"Error: Truncated file table at entry {len(file_table_data) // CDFS_FILE_ENTRY.size}")
+            return False
+        
+        file_table = unpack_file_table(file_table_data)
         
         string_table_data = f.read(string_table_length)
+        strings = unpack_string_table(string_table_data)
         
         file_tasks = []
-        for idx, entry in enumerate(file_table):
-            file_name = unpack_string_from_table(string_table_data, entry['file_name_offset'])
-            dir_name = unpack_string_from_table(string_table_data, entry['dir_name_offset'])
+        dir_paths = {}
+        for file_name_offset, dir_name_offset, start_sector, file_length in zip(*file_table):
+            file_name = get_string(strings, string_table_data, file_name_offset)
             
-            file_offset = first_sector_offset + entry['start_sector'] * sector_size
-            file_length = entry['length']
+            # Many entries share a directory, resolve each one only once
+            dir_path = dir_paths.get(dir_name_offset)
+            if dir_path is None:
+                dir_name = get_string(strings, string_table_data, dir_name_offset)
+                if dir_name:
+                    dir_path = os.path.join(output_dir, dir_name.replace('\\', '/'))
+                else:
+                    dir_path = output_dir
+                dir_paths[dir_name_offset] = dir_path
             
-            if dir_name:
-                dir_name = dir_name.replace('\\', '/')
-                file_path = os.path.join(output_dir, dir_name, file_name)
-            else:
-                file_path = os.path.join(output_dir, file_name)
+            file_offset = first_sector_offset + start_sector * sector_size
+            file_path = os.path.join(dir_path, file_name)
             
-            file_tasks.append((entry, file_path, file_offset, file_length, idx))
+            file_tasks.append((file_path, file_offset, file_length))
+        
+        # Workers only write file data, every directory is created up front
+        for dir_path in set(dir_paths.values()):
+            try:
+                if dir_path:
+                    os.makedirs(dir_path, exist_ok=True)
+            except OSError as exc:
+                print(f"Error creating directory {dir_path}: {exc}")
+        
+        # Dispatch in on-disk order so concurrent reads stay close together
+        file_tasks.sort(key=lambda task: task[1])
     
     print(f"Unpacking {file_table_entries} files...")
     
-    workers = max_workers or os.cpu_count()
+    # Few copies in flight keep the sorted reads close together for readahead
+    workers = max_workers or min(os.cpu_count() or 1, UNPACK_MAX_WORKERS)
     with ThreadPoolExecutor(max_workers=workers) as executor:
-        future_to_file = {}
-        for entry, file_path, file_offset, file_length, idx in file_tasks:
-            future = executor.submit(
-                unpack_file_task, 
-                input_file, 
-                entry, 
-                file_path, 
-                file_offset, 
-                file_length
-            )
-            future_to_file[future] = (file_path, idx, file_length)
+        results = executor.map(lambda task: unpack_file_task(input_file, *task), file_tasks)
         
         completed = 0
-        for future in concurrent.futures.as_completed(future_to_file):
-            file_path, idx, file_length = future_to_file[future]
-            try:
-                future.result()
-                completed += 1
-                if debug_mode:
-                    print(f"unpacking [{completed}/{file_table_entries}]: {file_path} ({file_length} bytes)")
-            except Exception as exc:
+        for (file_path, file_offset, file_length), exc in zip(file_tasks, results):
+            if exc is not None:
                 print(f"Error unpacking {file_path}: {exc}")
+                continue
+            completed += 1
+            if debug_mode:
+                print(f"unpacking [{completed}/{file_table_entries}]: {file_path} ({file_length} bytes)")
     
     print(f"Unpacking completed. Files unpacked to {output_dir}")
     return True
@@ -135,46 +247,118 @@ def unpack_cdfs(input_file, output_dir, max_workers=None, debug_mode=False):
 #==============================================================================
 
 def add_string_to_table(string_table, string_cache, string_value):
-    string_value = string_value.upper()
+    index = string_cache.get(string_value)
+    if index is not None:
+        return index
     
-    if string_value in string_cache:
-        return string_cache[string_value]
-    
-    index = 0
-    while index < (len(string_table) - len(string_value)):
-        if (string_table[index:index+len(string_value)] == string_value.encode('utf-8') and 
-            string_table[index+len(string_value)] == 0):
-            string_cache[string_value] = index
-            return index
-        index += len(string_table[index:].split(b'\0', 1)[0]) + 1
-    
-    index = len(string_table)
-    string_table += string_value.encode('utf-8') + b'\0'
+    index = string_table.tell()
+    string_table.write(string_value)
+    string_table.write(b'\0')
     string_cache[string_value] = index
     return index
 
 #==============================================================================
 
-def process_file_task(idx, file_info, output_file, sector_size, first_sector_offset):
+def write_at(fd, data, offset):
+    view = memoryview(data)
+    while view:
+        if hasattr(os, 'pwrite'):
+            written = os.pwrite(fd, view, offset)
+        else:
+            # The descriptor is shared between workers, keep seek+write together
+            with _write_lock:
+                os.lseek(fd, offset, os.SEEK_SET)
+                written = os.write(fd, view)
+        view = view[written:]
+        offset += written
+
+#==============================================================================
+
+def copy_to_archive(src_fd, dst_fd, offset, length):
+    copied_total = 0
+    
+    if hasattr(os, 'copy_file_range'):
+        try:
+            while copied_total < length:
+                copied = os.copy_file_range(src_fd, dst_fd, length - copied_total, offset_dst=offset + copied_total)
+                if copied == 0:
+                    break
+                copied_total += copied
+        except OSError:
+            pass
+    
+    while copied_total < length:
+        chunk = os.read(src_fd, min(length - copied_total, PACK_BUFFER_SIZE))
+        if not chunk:
+            break
+        write_at(dst_fd, chunk, offset + copied_total)
+        copied_total += len(chunk)
+    
+    return copied_total
+
+#==============================================================================
+
+def process_file_task(idx, file_path, file_size, file_offset, out_fd, sector_size):
     try:
-        with open(file_info['path'], 'rb') as in_file:
-            file_data = in_file.read()
-            
-        file_offset = first_sector_offset + file_info['start_sector'] * sector_size
-        sector_padding = (sector_size - (len(file_data) % sector_size)) % sector_size
+        in_fd = os.open(file_path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+        try:
+            file_size = copy_to_archive(in_fd, out_fd, file_offset, file_size)
+        finally:
+            os.close(in_fd)
         
-        with open(output_file, 'r+b') as f:
-            f.seek(file_offset)
-            f.write(file_data)
-            if sector_padding > 0:
-                f.write(b'\0' * sector_padding)
+        sector_padding = (sector_size - (file_size % sector_size)) % sector_size
+        if sector_padding > 0:
+            write_at(out_fd, b'\0' * sector_padding, file_offset + file_size)
         
-        return (idx, len(file_data), file_info['path'])
+        return (idx, file_size, file_path)
     except Exception as e:
         return (idx, 0, str(e))
 
 #==============================================================================
 
+def write_small_files_region(out_fd, region_data, region_offset, results, region_start):
+    try:
+        write_at(out_fd, region_data, region_offset)
+    except Exception as e:
+        # Every file buffered in the region failed with it
+        for result_idx in range(region_start, len(results)):
+            results[result_idx] = (results[result_idx][0], 0, str(e))
+
+#==============================================================================
+
+def process_small_files(small_files, out_fd, sector_size):
+    results = []
+    region_data = bytearray()
+    region_offset = 0
+    region_start = 0
+    
+    for idx, file_path, file_size, file_offset in small_files:
+        # Flush when the next file is not contiguous with the buffered region
+        if region_data and (region_offset + len(region_data) != file_offset or len(region_data) >= COALESCE_BUFFER_SIZE):
+            write_small_files_region(out_fd, region_data, region_offset, results, region_start)
+            region_data = bytearray()
+        if not region_data:
+            region_offset = file_offset
+            region_start = len(results)
+        
+        try:
+            with open(file_path, 'rb') as in_file:
+                file_data = in_file.read(file_size)
+            results.append((idx, len(file_data), file_path))
+        except Exception as e:
+            file_data = b''
+            results.append((idx, 0, str(e)))
+        
+        region_data += file_data
+        region_data += b'\0' * ((sector_size - (len(file_data) % sector_size)) % sector_size)
+    
+    if region_data:
+        write_small_files_region(out_fd, region_data, region_offset, results, region_start)
+    
+    return results
+
+#==============================================================================
+
 def read_files_from_list(file_list_path):  
     file_paths = []   
     try:
@@ -191,8 +375,53 @@ def read_files_from_list(file_list_path):
 
 #==============================================================================
 
+def make_file_info(file_path, rel_path, file_size, encoded_names):
+    dir_name, file_name = os.path.split(rel_path.replace('/', '\\'))
+    
+    # Upper-cased table names are encoded once per unique name, not per lookup
+    dir_upper = encoded_names.get(dir_name)
+    if dir_upper is None:
+        dir_upper = encoded_names[dir_name] = dir_name.upper().encode('utf-8')
+    file_upper = encoded_names.get(file_name)
+    if file_upper is None:
+        file_upper = encoded_names[file_name] = file_name.upper().encode('utf-8')
+    
+    return {
+        'path': file_path,
+        'rel_path': rel_path,
+        'size': file_size,
+        'dir_upper': dir_upper,
+        'file_upper': file_upper
+    }
+
+#==============================================================================
+
+def scan_directory(dir_path, rel_dir, file_paths, encoded_names):
+    try:
+        with os.scandir(dir_path) as it:
+            entries = list(it)
+    except OSError:
+        return
+    
+    # Same order as os.walk: this directory's files first, then each subdirectory
+    sub_dirs = []
+    for entry in entries:
+        rel_path = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+        if entry.is_dir():
+            if not entry.is_symlink():
+                sub_dirs.append((entry.path, rel_path))
+            continue
+        
+        file_paths.append(make_file_info(entry.path, rel_path, entry.stat().st_size, encoded_names))
+    
+    for sub_dir_path, sub_rel_dir in sub_dirs:
+        scan_directory(sub_dir_path, sub_rel_dir, file_paths, encoded_names)
+
+#==============================================================================
+
 def pack_cdfs(input_path, output_file, sector_size=2048, cache_size=128*1024, max_workers=None, debug_mode=False, pack_using_file_list=False):    
     file_paths = []    
+    encoded_names = {}
     if pack_using_file_list:
         raw_file_paths = read_files_from_list(input_path)
         if not raw_file_paths:
@@ -200,28 +429,12 @@ def pack_cdfs(input_path, output_file, sector_size=2048, cache_size=128*1024, ma
             
         for file_path in raw_file_paths:
             if os.path.exists(file_path):
-                dir_path, file_name = os.path.split(file_path)
                 file_size = os.path.getsize(file_path)
-                
-                file_paths.append({
-                    'path': file_path,
-                    'rel_path': file_path,
-                    'size': file_size
-                })
+                file_paths.append(make_file_info(file_path, file_path, file_size, encoded_names))
             else:
                 print(f"Warning: File {file_path} not found.")
     else:
-        for root, dirs, files in os.walk(input_path):
-            for file in files:
-                file_path = os.path.join(root, file)
-                rel_path = os.path.relpath(file_path, input_path)
-                file_size = os.path.getsize(file_path)
-                
-                file_paths.append({
-                    'path': file_path,
-                    'rel_path': rel_path,
-                    'size': file_size
-                })
+        scan_directory(input_path, '', file_paths, encoded_names)
     
     print(f"Found {len(file_paths)} files for packing")
     
@@ -229,33 +442,28 @@ def pack_cdfs(input_path, output_file, sector_size=2048, cache_size=128*1024, ma
         print("No files for packing. Canceling operation.")
         return False
     
-    string_table = bytearray(b'\0')
+    string_table = io.BytesIO()
+    string_table.write(b'\0')
     string_table_entries = 1
-    string_cache = {}
+    string_cache = {b'': 0}
     
-    file_table = []  
+    file_name_offsets = array.array('I')
+    dir_name_offsets = array.array('I')
+    file_sizes = array.array('I', (file_info['size'] for file_info in file_paths))
     for file_info in file_paths:
-        rel_path = file_info['rel_path'].replace('/', '\\')
-        dir_name, file_name = os.path.split(rel_path)
-        
-        dir_name_offset = add_string_to_table(string_table, string_cache, dir_name)
-        file_name_offset = add_string_to_table(string_table, string_cache, file_name)
-        
-        file_table.append({
-            'file_name_offset': file_name_offset,
-            'dir_name_offset': dir_name_offset,
-            'path': file_info['path'],
-            'size': file_info['size']
-        })
-        
-        if dir_name and dir_name_offset == len(string_table) - len(dir_name) - 1:
-            string_table_entries += 1
-        if file_name_offset == len(string_table) - len(file_name) - 1:
-            string_table_entries += 1
-    
-    header_size = 40
-    file_table_size = len(file_table) * 16
-    string_table_size = len(string_table)
+        cached_strings = len(string_cache)
+        dir_name_offset = add_string_to_table(string_table, string_cache, file_info['dir_upper'])
+        file_name_offset = add_string_to_table(string_table, string_cache, file_info['file_upper'])
+        string_table_entries += len(string_cache) - cached_strings
+        
+        file_name_offsets.append(file_name_offset)
+        dir_name_offsets.append(dir_name_offset)
+    
+    string_table_data = string_table.getvalue()
+    
+    header_size = CDFS_HEADER.size
+    file_table_size = len(file_paths) * CDFS_FILE_ENTRY.size
+    string_table_size = len(string_table_data)
     first_sector_offset = header_size + file_table_size + string_table_size
     
     if first_sector_offset % sector_size != 0:
@@ -264,71 +472,82 @@ def pack_cdfs(input_path, output_file, sector_size=2048, cache_size=128*1024, ma
     else:
         padding = 0
     
-    current_sector = 0
-    for entry in file_table:
-        entry['start_sector'] = current_sector
-        sectors_needed = (entry['size'] + sector_size - 1) // sector_size
-        current_sector += sectors_needed
-    
-    with open(output_file, 'wb') as f:
-        header = struct.pack('<IIIIIIIIII', 
-                             CDFS_MAGIC,
-                             CDFS_VERSION,
-                             sector_size,
-                             cache_size,
-                             first_sector_offset,
-                             current_sector,
-                             file_table_size,
-                             len(file_table),
-                             string_table_size,
-                             string_table_entries)
-        
-        f.write(header)
-        
-        for entry in file_table:
-            entry_data = struct.pack('<IIII',
-                                    entry['file_name_offset'],
-                                    entry['dir_name_offset'],
-                                    entry['start_sector'],
-                                    entry['size'])
-            f.write(entry_data)
-        
-        f.write(string_table)
-        
-        if padding > 0:
-            f.write(b'\0' * padding)
-        
-        total_size = sum(entry['size'] for entry in file_table)
-        
-        f.seek(first_sector_offset + current_sector * sector_size - 1)
-        f.write(b'\0')
-    
-    workers = max_workers or os.cpu_count()
-    with ThreadPoolExecutor(max_workers=workers) as executor:
-        futures = []
-        for idx, entry in enumerate(file_table):
-            future = executor.submit(
-                process_file_task,
-                idx,
-                entry,
-                output_file,
-                sector_size,
-                first_sector_offset
-            )
-            futures.append(future)
-        
-        processed_size = 0
-        completed = 0
-        for future in concurrent.futures.as_completed(futures):
-            idx, file_size, file_path = future.result()
-            completed += 1
-            if isinstance(file_path, str) and os.path.exists(file_path):
-                processed_size += file_size
-                if debug_mode:
-                    print(f"Packing [{completed}/{len(file_table)}]: {file_path} ({file_size} bytes)")
-                    print(f"Progress: {processed_size}/{total_size} bytes ({int(processed_size*100/total_size)}%)")
+    # Prefix sum of ceil(size / sector_size), the final total is the sector count
+    sector_counts = ((file_size + sector_size - 1) // sector_size for file_size in file_sizes)
+    start_sectors = array.array('I', itertools.accumulate(sector_counts, initial=0))
+    current_sector = start_sectors.pop()
+    
+    final_size = first_sector_offset + current_sector * sector_size
+    
+    out_fd = os.open(output_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o666)
+    
+    try:
+        # Reserve the whole archive up front so parallel writers never fill holes
+        try:
+            os.posix_fallocate(out_fd, 0, final_size)
+        except AttributeError:
+            os.ftruncate(out_fd, final_size)
+        except OSError as exc:
+            # Only fall back when the filesystem cannot preallocate, a full disk fails here
+            if exc.errno not in (errno.EOPNOTSUPP, errno.EINVAL, errno.ENOSYS):
+                raise
+            os.ftruncate(out_fd, final_size)
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(out_fd, 0, final_size, os.POSIX_FADV_SEQUENTIAL)
+        
+        header = CDFS_HEADER.pack(CDFS_MAGIC,
+                                  CDFS_VERSION,
+                                  sector_size,
+                                  cache_size,
+                                  first_sector_offset,
+                                  current_sector,
+                                  file_table_size,
+                                  len(file_paths),
+                                  string_table_size,
+                                  string_table_entries)
+        
+        file_table_data = pack_file_table(file_name_offsets, dir_name_offsets, start_sectors, file_sizes)
+        
+        # Header, file table, string table and padding go out in a single syscall
+        header_buffers = [header, file_table_data, string_table_data, b'\0' * padding]
+        written = os.pwritev(out_fd, header_buffers, 0) if hasattr(os, 'pwritev') else 0
+        if written < first_sector_offset:
+            write_at(out_fd, b''.join(header_buffers)[written:], written)
+        
+        total_size = sum(file_sizes)
+        
+        small_files = []
+        large_files = []
+        for idx, (file_info, file_size, start_sector) in enumerate(zip(file_paths, file_sizes, start_sectors)):
+            file_task = (idx, file_info['path'], file_size, first_sector_offset + start_sector * sector_size)
+            if file_size < SMALL_FILE_SIZE:
+                small_files.append(file_task)
             else:
-                print(f"Error packing file {idx}: {file_path}")
+                large_files.append(file_task)
+        
+        workers = max_workers or os.cpu_count()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(
+                lambda task: process_file_task(*task, out_fd, sector_size),
+                large_files
+            )
+            
+            # Small files are coalesced into large writes here while the pool copies the rest
+            results = itertools.chain(process_small_files(small_files, out_fd, sector_size), results)
+            
+            processed_size = 0
+            completed = 0
+            for idx, file_size, file_path in results:
+                completed += 1
+                if isinstance(file_path, str) and os.path.exists(file_path):
+                    processed_size += file_size
+                    if debug_mode:
+                        print(f"Packing [{completed}/{len(file_paths)}]: {file_path} ({file_size} bytes)")
+                        print(f"Progress: {processed_size}/{total_size} bytes ({int(processed_size*100/total_size)}%)")
+                else:
+                    print(f"Error packing file {idx}: {file_path}")
+    finally:
+        os.close(out_fd)
     
     print(f"Packing completed. Archive saved to {output_file}")
     return True
@@ -337,10 +556,10 @@ def pack_cdfs(input_path, output_file, sector_size=2048, cache_size=128*1024, ma
 
 def list_cdfs(input_file, output_file=None, write_list_to_txt=False):
     with open(input_file, 'rb') as f:
-        header_data = f.read(40)
+        header_data = f.read(CDFS_HEADER.size)
         magic, version, sector_size, recommended_cache_size, first_sector_offset, \
         total_sectors, file_table_length, file_table_entries, string_table_length, \
-        string_table_entries = struct.unpack('<IIIIIIIIII', header_data)
+        string_table_entries = CDFS_HEADER.unpack(header_data)
         
         if magic != CDFS_MAGIC:
             print(f"Error: Invalid file format. Magic number: {hex(magic)}")
@@ -353,32 +572,29 @@ def list_cdfs(input_file, output_file=None, write_list_to_txt=False):
         for line in output_lines:
             print(line)
         
-        file_table = []
-        for i in range(file_table_entries):
-            entry_data = f.read(16)
-            file_name_offset, dir_name_offset, start_sector, length = struct.unpack('<IIII', entry_data)
-            file_table.append({
-                'file_name_offset': file_name_offset,
-                'dir_name_offset': dir_name_offset,
-                'start_sector': start_sector,
-                'length': length
-            })
+        file_table_data = f.read(file_table_entries * CDFS_FILE_ENTRY.size)
+        if len(file_table_data) < file_table_entries * CDFS_FILE_ENTRY.size:
+            print(f"Error: Truncated file table at entry {len(file_table_data) // CDFS_FILE_ENTRY.size}")
+            return False
+        
+        file_table = unpack_file_table(file_table_data)
         
         string_table_data = f.read(string_table_length)
+        strings = unpack_string_table(string_table_data)
         
         file_lines = []
         file_paths = []
         
-        for idx, entry in enumerate(file_table):
-            file_name = unpack_string_from_table(string_table_data, entry['file_name_offset'])
-            dir_name = unpack_string_from_table(string_table_data, entry['dir_name_offset'])
+        for idx, (file_name_offset, dir_name_offset, start_sector, length) in enumerate(zip(*file_table)):
+            file_name = get_string(strings, string_table_data, file_name_offset)
+            dir_name = get_string(strings, string_table_data, dir_name_offset)
             
             if dir_name:
                 full_path = f"{dir_name}\\{file_name}"
             else:
                 full_path = file_name
             
-            line = f"{idx:<6} {entry['length']:<12} {full_path}"
+            line = f"{idx:<6} {length:<12} {full_path}"
             file_lines.append(line)
             file_paths.append(full_path)
             print(line)
@@ -400,14 +616,14 @@ def list_cdfs(input_file, output_file=None, write_list_to_txt=False):
 def verify_cdfs(input_file):
     try:
         with open(input_file, 'rb') as f:
-            header_data = f.read(40)
-            if len(header_data) < 40:
+            header_data = f.read(CDFS_HEADER.size)
+            if len(header_data) < CDFS_HEADER.size:
                 print("Error: File is too small to be a valid CDFS archive")
                 return False
                 
             magic, version, sector_size, recommended_cache_size, first_sector_offset, \
             total_sectors, file_table_length, file_table_entries, string_table_length, \
-            string_table_entries = struct.unpack('<IIIIIIIIII', header_data)
+            string_table_entries = CDFS_HEADER.unpack(header_data)
             
             if magic != CDFS_MAGIC:
                 print(f"Error: Invalid file format. Magic number: {hex(magic)}")
@@ -423,54 +639,58 @@ def verify_cdfs(input_file):
                 print(f"Error: First sector offset ({first_sector_offset}) exceeds file size ({file_size})")
                 return False
             
-            if file_table_entries * 16 != file_table_length:
-                print(f"Error: File table length mismatch. Expected {file_table_entries * 16}, found {file_table_length}")
+            if file_table_entries * CDFS_FILE_ENTRY.size != file_table_length:
+                print(f"Error: File table length mismatch. Expected {file_table_entries * CDFS_FILE_ENTRY.size}, found {file_table_length}")
+                return False
+            
+            file_table_data = f.read(file_table_entries * CDFS_FILE_ENTRY.size)
+            if len(file_table_data) < file_table_entries * CDFS_FILE_ENTRY.size:
+                print(f"Error: Truncated file table at entry {len(file_table_data) // CDFS_FILE_ENTRY.size}")
                 return False
             
-            file_table = []
-            for i in range(file_table_entries):
-                entry_data = f.read(16)
-                if len(entry_data) < 16:
-                    print(f"Error: Truncated file table at entry {i}")
-                    return False
-                    
-                file_name_offset, dir_name_offset, start_sector, length = struct.unpack('<IIII', entry_data)
-                file_table.append({
-                    'file_name_offset': file_name_offset,
-                    'dir_name_offset': dir_name_offset,
-                    'start_sector': start_sector,
-                    'length': length
-                })
+            file_table = unpack_file_table(file_table_data)
             
             print("Verifying string table integrity...")
             string_table_data = f.read(string_table_length)
             if len(string_table_data) < string_table_length:
                 print(f"Error: Truncated string table")
                 return False
+            strings = unpack_string_table(string_table_data)
             
             print("Verifying file entries and offsets...")
-            for idx, entry in enumerate(file_table):
-                file_offset = first_sector_offset + entry['start_sector'] * sector_size
-                file_end = file_offset + entry['length']
-                
-                if file_end > file_size:
-                    print(f"Error: File entry {idx} extends beyond end of archive")
-                    return False
-                
-                if entry['file_name_offset'] >= string_table_length:
-                    print(f"Error: File entry {idx} has invalid filename offset")
-                    return False
-                    
-                if entry['dir_name_offset'] >= string_table_length:
-                    print(f"Error: File entry {idx} has invalid directory name offset")
-                    return False
-                
+            file_name_offsets, dir_name_offsets, start_sectors, lengths = file_table
+            
+            # Checks run per column; the lowest failing entry is reported, earlier checks first
+            errors = []
+            
+            file_ends = array.array('Q', (start * sector_size + length for start, length in zip(start_sectors, lengths)))
+            if first_sector_offset + max(file_ends, default=0) > file_size:
+                idx = next(i for i, file_end in enumerate(file_ends) if first_sector_offset + file_end > file_size)
+                errors.append((idx, 0, "extends beyond end of archive"))
+            
+            if max(file_name_offsets, default=0) >= string_table_length:
+                idx = next(i for i, offset in enumerate(file_name_offsets) if offset >= string_table_length)
+                errors.append((idx, 1, "has invalid filename offset"))
+            
+            if max(dir_name_offsets, default=0) >= string_table_length:
+                idx = next(i for i, offset in enumerate(dir_name_offsets) if offset >= string_table_length)
+                errors.append((idx, 2, "has invalid directory name offset"))
+            
+            invalid_offsets = set()
+            for offset in set(file_name_offsets).union(dir_name_offsets).difference(strings):
                 try:
-                    file_name = unpack_string_from_table(string_table_data, entry['file_name_offset'])
-                    dir_name = unpack_string_from_table(string_table_data, entry['dir_name_offset'])
+                    unpack_string_from_table(string_table_data, offset)
                 except UnicodeDecodeError:
-                    print(f"Error: File entry {idx} has invalid string table references")
-                    return False
+                    invalid_offsets.add(offset)
+            
+            if invalid_offsets:
+                idx = next(i for i, offsets in enumerate(zip(file_name_offsets, dir_name_offsets)) if not invalid_offsets.isdisjoint(offsets))
+                errors.append((idx, 3, "has invalid string table references"))
+            
+            if errors:
+                idx, _, message = min(errors)
+                print(f"Error: File entry {idx} {message}")
+                return False
             
             print("Verification successful!")
             print(f"Archive contains {file_table_entries} files across {total_sectors} sectors")